@@ -0,0 +1,32 @@
+"""Add invoice status/seller listing indexes and product stock index
+
+Revision ID: 4c9e2b7d1f3a
+Revises: ea05afaa1d54
+Create Date: 2026-10-15 14:12:05.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c9e2b7d1f3a'
+down_revision: Union[str, Sequence[str], None] = 'ea05afaa1d54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_invoices_status_created_at_id', 'invoices', ['status', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_invoices_sold_by_id_created_at_id', 'invoices', ['sold_by_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_products_quantity_on_hand', 'products', ['quantity_on_hand'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_quantity_on_hand', table_name='products')
+    op.drop_index('ix_invoices_sold_by_id_created_at_id', table_name='invoices')
+    op.drop_index('ix_invoices_status_created_at_id', table_name='invoices')
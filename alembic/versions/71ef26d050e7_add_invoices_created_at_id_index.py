@@ -0,0 +1,28 @@
+"""Add invoices (created_at, id) index for keyset pagination
+
+Revision ID: 71ef26d050e7
+Revises: 3359fbc0fb10
+Create Date: 2026-10-15 10:12:04.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71ef26d050e7'
+down_revision: Union[str, Sequence[str], None] = '3359fbc0fb10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_invoices_created_at_id', 'invoices', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoices_created_at_id', table_name='invoices')
@@ -0,0 +1,38 @@
+"""Add SALE and SALE_REVERSAL stock adjustment reasons
+
+Revision ID: 8f3d1a6c2e57
+Revises: 4c9e2b7d1f3a
+Create Date: 2026-10-15 16:40:21.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3d1a6c2e57'
+down_revision: Union[str, Sequence[str], None] = '4c9e2b7d1f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only PostgreSQL has a native enum type to extend; elsewhere the column is
+    # a VARCHAR already wide enough for the new values.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older
+    # PostgreSQL versions
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE stockadjustmentreason ADD VALUE IF NOT EXISTS 'SALE'")
+        op.execute("ALTER TYPE stockadjustmentreason ADD VALUE IF NOT EXISTS 'SALE_REVERSAL'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL cannot drop values from an enum type; the extra values are
+    # harmless to the previous revision, so they are left in place.
+    pass
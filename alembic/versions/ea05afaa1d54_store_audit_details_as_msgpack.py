@@ -0,0 +1,79 @@
+"""Store audit log details as MessagePack bytes
+
+Revision ID: ea05afaa1d54
+Revises: ed44a7b8cb40
+Create Date: 2026-10-15 14:41:09.317204
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import msgspec
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ea05afaa1d54'
+down_revision: Union[str, Sequence[str], None] = 'ed44a7b8cb40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Untyped column so rows come back exactly as the driver returns them (str or bytes).
+audit_logs = sa.table('audit_logs', sa.column('id', sa.String()), sa.column('details'))
+
+
+def _rewrite_details(convert) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(audit_logs.c.id, audit_logs.c.details).where(audit_logs.c.details.is_not(None))
+    ).all()
+    for row_id, details in rows:
+        bind.execute(
+            audit_logs.update().where(audit_logs.c.id == row_id).values(details=convert(details))
+        )
+
+
+def _to_text(value) -> str:
+    return bytes(value).decode('utf-8') if isinstance(value, (bytes, memoryview)) else value
+
+
+def _json_to_msgpack(value) -> bytes:
+    try:
+        data = json.loads(_to_text(value))
+    except ValueError:
+        # Malformed legacy row: keep the original text rather than abort the migration
+        raw = bytes(value).decode('utf-8', 'replace') if isinstance(value, (bytes, memoryview)) else value
+        data = {"raw": raw}
+    return msgspec.msgpack.encode(data)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('audit_logs') as batch_op:
+        batch_op.alter_column(
+            'details',
+            existing_type=sa.Text(),
+            type_=sa.LargeBinary(),
+            existing_nullable=True,
+            postgresql_using="convert_to(details, 'UTF8')",
+        )
+    # Re-encode existing JSON text as MessagePack
+    _rewrite_details(_json_to_msgpack)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Back to UTF-8 JSON bytes first so the type change can convert them in place
+    _rewrite_details(lambda value: json.dumps(msgspec.msgpack.decode(bytes(value))).encode('utf-8'))
+    with op.batch_alter_table('audit_logs') as batch_op:
+        batch_op.alter_column(
+            'details',
+            existing_type=sa.LargeBinary(),
+            type_=sa.Text(),
+            existing_nullable=True,
+            postgresql_using="convert_from(details, 'UTF8')",
+        )
+    # SQLite keeps BLOB storage across the copy; store the JSON as text again
+    _rewrite_details(_to_text)
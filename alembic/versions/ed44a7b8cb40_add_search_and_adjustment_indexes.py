@@ -0,0 +1,33 @@
+"""Add product name search index and composite stock adjustment index
+
+Revision ID: ed44a7b8cb40
+Revises: 71ef26d050e7
+Create Date: 2026-10-15 11:03:47.220591
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ed44a7b8cb40'
+down_revision: Union[str, Sequence[str], None] = '71ef26d050e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_name_lower', 'products', [sa.text('lower(name)')], unique=False)
+    op.create_index('ix_stock_adjustments_product_id_created', 'stock_adjustments', ['product_id', 'created_at'], unique=False)
+    # Covered by the leading column of the composite index above.
+    op.drop_index('ix_stock_adjustments_product_id', table_name='stock_adjustments')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_stock_adjustments_product_id', 'stock_adjustments', ['product_id'], unique=False)
+    op.drop_index('ix_stock_adjustments_product_id_created', table_name='stock_adjustments')
+    op.drop_index('ix_products_name_lower', table_name='products')
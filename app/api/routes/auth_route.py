@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.core.security import Token, create_access_token
 from app.core.dependencies import get_current_user
-from app.db.session import get_db
+from app.db.session import get_db, transaction
 from app.schemas.user_schema import LoginUser, RegisterUser, UserRead
 from app.services.user_service import UserService
 
@@ -15,7 +15,8 @@ router = APIRouter()
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register(user: RegisterUser, db: Session = Depends(get_db)):
     try:
-        created = UserService.register_user(db, user)
+        with transaction(db):
+            created = UserService.register_user(db, user)
     except ValueError as exc:
         # Map our specific conflict signal to a 400; re-raise anything else
         if str(exc) == "username or email taken":
@@ -54,10 +55,10 @@ def login(user: LoginUser, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserRead)
-def read_me(current_user = Depends(get_current_user)):
+async def read_me(current_user = Depends(get_current_user)):
     return current_user
 
 
 @router.get("/ping")
-def ping():
+async def ping():
     return {"status": "ok"}
@@ -1,41 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, selectinload
-from app.models.invoice_item_table import InvoiceItem
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from app.core.config import MAX_BATCH_ITEMS, MAX_PAGE_SIZE
 from app.core.dependencies import require_role, get_current_user
 from app.services.invoice_service import InvoiceService
-from app.schemas.invoice_schema import ReadInvoice
+from app.schemas.invoice_schema import ReadInvoice, ReadInvoiceSummary
 from app.schemas.invoice_item_schema import AddInvoiceItem
 from app.models.invoice_table import Invoice as InvoiceTable, InvoiceStatus
 from app.models.user_table import UserRole
-from app.db.session import get_db
+from app.db.session import get_db, transaction
 from typing import Optional
 
 
 def _get_invoice_or_404(db: Session, invoice_id: str) -> InvoiceTable:
     """Get invoice with relationships or 404."""
-    invoice = db.query(InvoiceTable).options(
-        selectinload(InvoiceTable.items).selectinload(InvoiceItem.product),
-        selectinload(InvoiceTable.items).selectinload(InvoiceItem.product_unit)
-    ).filter(InvoiceTable.id == invoice_id).first()
-    
+    invoice = InvoiceService.get_invoice_with_items(db, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
 
 
-def _build_invoice_response(invoice: InvoiceTable, name: Optional[str] = None) -> ReadInvoice:
-    """Build invoice response with calculated total."""
-    total = sum(float(item.quantity * item.unit_price) for item in invoice.items) if invoice.items else 0.0
-    
-    return ReadInvoice(
-        id=invoice.id,
-        sold_by_id=invoice.sold_by_id,
-        status=invoice.status,
-        created_at=invoice.created_at,
-        items=invoice.items,
-        total_amount= total,
-        name=name
-    )
+def _build_invoice_response(invoice: InvoiceTable, name: Optional[str] = None, summary: bool = False) -> ReadInvoiceSummary:
+    """Build invoice response; the total is summed by the database.
+
+    Validated straight from the ORM object (from_attributes) in one pass.
+    With summary=True the items collection is never touched.
+    """
+    schema = ReadInvoiceSummary if summary else ReadInvoice
+    response = schema.model_validate(invoice)
+    response.name = name
+    return response
 
 
 router = APIRouter()
@@ -47,10 +40,11 @@ def create_invoice(
     current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER, UserRole.SALES))
 ):
     """Create a new invoice."""
-    invoice = InvoiceService.create_invoice(
-        db=db,
-        sold_by_id=current_user.id,
-    )
+    with transaction(db):
+        invoice = InvoiceService.create_invoice(
+            db=db,
+            sold_by_id=current_user.id,
+        )
     
     return _build_invoice_response(invoice, name=current_user.full_name)
 
@@ -65,39 +59,89 @@ def add_invoice_item(
     """Add item to invoice."""
     invoice = _get_invoice_or_404(db, invoice_id)
     
-    invoice_item = InvoiceService.add_item(
-        db=db,
-        invoice=invoice,
-        product_id=item.product_id,
-        product_unit_id=item.product_unit_id,
-        quantity=item.quantity,
-        unit_price=item.unit_price or 0.0,
-        user_id=current_user.id
-    )
+    try:
+        with transaction(db):
+            InvoiceService.add_item(
+                db=db,
+                invoice=invoice,
+                product_id=item.product_id,
+                product_unit_id=item.product_unit_id,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                user_id=current_user.id
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _build_invoice_response(invoice, name=current_user.full_name)
+
+
+@router.post("/{invoice_id}/items/batch", response_model=ReadInvoice)
+def add_invoice_items(
+    invoice_id: str,
+    items: list[AddInvoiceItem] = Body(..., max_length=MAX_BATCH_ITEMS),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER, UserRole.SALES))
+):
+    """Add several items to an invoice with a single commit.
+
+    At most MAX_BATCH_ITEMS lines per request (more → 422).
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="No items to add")
+    
+    invoice = _get_invoice_or_404(db, invoice_id)
+    
+    try:
+        with transaction(db):
+            InvoiceService.add_items(
+                db=db,
+                invoice=invoice,
+                items=[
+                    {
+                        "product_id": item.product_id,
+                        "product_unit_id": item.product_unit_id,
+                        "quantity": item.quantity,
+                        "unit_price": item.unit_price,
+                    }
+                    for item in items
+                ],
+                user_id=current_user.id
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Refresh invoice to get updated items
-    db.refresh(invoice)
     return _build_invoice_response(invoice, name=current_user.full_name)
 
 
-@router.get("/all", response_model=list[ReadInvoice])
+@router.get("/all", response_model=list[ReadInvoiceSummary])
 def list_invoices(
+    response: Response,
     status: Optional[InvoiceStatus] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER))
 ):
-    """List invoices with optional filtering."""
-    invoices = InvoiceService.list_invoices(
-        db=db,
-        status=status,
-        user_id=current_user.id if current_user.role != UserRole.ADMIN else None,
-        limit=limit,
-        offset=offset
-    )
+    """List invoices with optional filtering.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next page.
+    """
+    try:
+        invoices = InvoiceService.list_invoices(
+            db=db,
+            status=status,
+            user_id=current_user.id if current_user.role != UserRole.ADMIN else None,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(invoices) == limit:
+        response.headers["X-Next-Cursor"] = invoices[-1].id
     
-    return [_build_invoice_response(inv, name=current_user.full_name) for inv in invoices]
+    return [_build_invoice_response(inv, name=current_user.full_name, summary=True) for inv in invoices]
 
 
 @router.post("/{invoice_id}/finalize", response_model=ReadInvoice)
@@ -110,11 +154,12 @@ def finalize_invoice(
     invoice = _get_invoice_or_404(db, invoice_id)
     
     try:
-        InvoiceService.finalize_invoice(db, invoice, user_id=current_user.id)
-        db.refresh(invoice)
-        return _build_invoice_response(invoice, name=current_user.full_name)
+        with transaction(db):
+            InvoiceService.finalize_invoice(db, invoice, user_id=current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    return _build_invoice_response(invoice, name=current_user.full_name)
 
 
 @router.post("/{invoice_id}/cancel", response_model=ReadInvoice)
@@ -128,11 +173,12 @@ def cancel_invoice(
     invoice = _get_invoice_or_404(db, invoice_id)
     
     try:
-        InvoiceService.cancel_invoice(db, invoice, reason=reason, user_id=current_user.id)
-        db.refresh(invoice)
-        return _build_invoice_response(invoice, name=current_user.full_name)
+        with transaction(db):
+            InvoiceService.cancel_invoice(db, invoice, reason=reason, user_id=current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    return _build_invoice_response(invoice, name=current_user.full_name)
 
 
 @router.get("/{invoice_id}", response_model=ReadInvoice)
@@ -1,15 +1,14 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from app.core.config import MAX_PAGE_SIZE
 from app.core.dependencies import require_role
-from app.schemas.stock_adjustment_schema import AdjustStockResponse, CreateStockAdjustment
+from app.schemas.stock_adjustment_schema import AdjustStockResponse, CreateStockAdjustment, ReadStockAdjustment
 from app.schemas.products_schema import CreateProduct, ReadProduct, UpdateProduct
 from app.services.product_service import ProductService
 from app.models.user_table import UserRole
-from app.models.product_table import Product as ProductTable
-from app.models.product_unit_table import ProductUnit
-from app.schemas.product_unit_schema import ReadProductUnit
-from app.db.session import get_db
+from app.schemas.product_unit_schema import ReadEligibleProductUnit, ReadProductUnit
+from app.db.session import get_db, transaction
 
 router = APIRouter()
 
@@ -21,41 +20,64 @@ def create_product(
     current_user = Depends(require_role(UserRole.ADMIN))
 ):
     """Create a new product."""
-    # Check for existing SKU
-    existing = db.query(ProductTable).filter(ProductTable.sku == product.sku).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
-    
-    new_product = ProductService.create_product(
-        db=db,
-        name=product.name,
-        description=product.description,
-        quantity_on_hand=product.quantity_on_hand or 0,
-        user_id=current_user.id
-    )
+    try:
+        with transaction(db):
+            new_product = ProductService.create_product(
+                db=db,
+                data=product.model_dump(),
+                user_id=current_user.id
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return new_product
 
 
 @router.get("/", response_model=list[ReadProduct])
 def list_products(
+    response: Response,
     name: Optional[str] = None,
     min_stock: Optional[int] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER, UserRole.SALES))
 ):
-    """List products with optional filtering."""
-    products = ProductService.list_products(
-        db=db,
-        name_filter=name,
-        min_stock=min_stock,
-        limit=limit,
-        offset=offset
-    )
+    """List products with optional filtering.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next page.
+    """
+    try:
+        products = ProductService.list_products(
+            db=db,
+            name_filter=name,
+            min_stock=min_stock,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(products) == limit:
+        response.headers["X-Next-Cursor"] = products[-1].id
     
-    return products
+    # Rows come straight from our database, so skip per-field validation
+    return [ReadProduct.from_orm_trusted(product) for product in products]
+
+
+# Declared before /{product_id} so "eligible" is not taken for a product ID.
+@router.get("/eligible", response_model=ReadEligibleProductUnit)
+def get_eligible_product_unit(
+    min_units: int = Query(1, ge=1),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER, UserRole.SALES))
+):
+    """Get a product + unit pair with stock for at least `min_units` of that unit."""
+    match = ProductService.find_eligible_product_unit(db, min_units)
+    if match is None:
+        raise HTTPException(status_code=404, detail="No product unit with enough stock")
+
+    return match
 
 
 @router.get("/{product_id}", response_model=ReadProduct)
@@ -83,8 +105,8 @@ def get_product_units(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    units = db.query(ProductUnit).filter(ProductUnit.product_id == product_id).all()
-    return units
+    units = ProductService.get_product_units(db, product_id)
+    return [ReadProductUnit.from_orm_trusted(unit) for unit in units]
 
 
 @router.post("/{product_id}/adjust-stock", response_model=AdjustStockResponse)
@@ -92,26 +114,28 @@ def adjust_stock(product_id: str, payload: CreateStockAdjustment,
                 db: Session = Depends(get_db), current_user = Depends(require_role(UserRole.ADMIN, UserRole.CASHIER))
 ):
     """Adjust product stock."""
-    product = ProductService.get_product_by_id(db, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
     try:
-        adjustment = ProductService.adjust_stock(
-            db=db,
-            product=product,
-            change_qty=payload.change_qty,
-            reason=payload.reason.value,
-            reference=payload.reference,
-            note=payload.note,
-            user_id=current_user.id
-        )
-        
-        return {"product": product, "adjustment": adjustment}
-        
+        with transaction(db):
+            adjustment = ProductService.adjust_stock(
+                db=db,
+                product_id=product_id,
+                change_qty=payload.change_qty,
+                reason=payload.reason.value,
+                reference=payload.reference,
+                note=payload.note,
+                user_id=current_user.id
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    if adjustment is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    return AdjustStockResponse(
+        product=ReadProduct.from_orm_trusted(adjustment.product),
+        adjustment=ReadStockAdjustment.from_orm_trusted(adjustment),
+    )
+
 
 @router.patch("/{product_id}", response_model=ReadProduct)
 def update_product(
@@ -130,15 +154,15 @@ def update_product(
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
     
-    updated_product = ProductService.update_product(
-        db=db,
-        product=product,
-        name=update_data.get("name"),
-        description=update_data.get("description"),
-        user_id=current_user.id
-    )
+    with transaction(db):
+        updated_product = ProductService.update_product(
+            db=db,
+            product=product,
+            changes=update_data,
+            user_id=current_user.id
+        )
     
-    return updated_product
+    return ReadProduct.from_orm_trusted(updated_product)
 
 
 @router.delete("/{product_id}")
@@ -153,14 +177,13 @@ def delete_product(
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Check if product has invoice history
-    from app.models.invoice_item_table import InvoiceItem
-    invoice_ref = db.query(InvoiceItem).filter(InvoiceItem.product_id == product_id).first()
-    if invoice_ref:
+    if ProductService.has_invoice_history(db, product_id):
         raise HTTPException(
             status_code=400,
             detail="Cannot delete product with invoice history"
         )
     
-    ProductService.delete_product(db=db, product=product, user_id=current_user.id)
+    with transaction(db):
+        ProductService.delete_product(db=db, product=product, user_id=current_user.id)
     
-    return {"status": "deleted", "message": "Product deleted successfully", "product": product}
+    return {"status": "deleted", "message": "Product deleted successfully", "product": ReadProduct.from_orm_trusted(product)}
@@ -4,5 +4,5 @@ router = APIRouter()
 
 
 @router.get("/ping")
-def ping():
+async def ping():
     return {"status": "ok"}
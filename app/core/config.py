@@ -6,12 +6,29 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 DB_DIR = BASE_DIR / "app" / "_db"
 DB_PATH = DB_DIR / "vigilis.db"
 
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+# Any SQLAlchemy URL; defaults to the bundled SQLite file.
+DATABASE_URL = os.getenv("VIGILIS_DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+# Connection pool (per process) and SQLAlchemy's compiled-statement cache.
+DB_POOL_SIZE = int(os.getenv("VIGILIS_DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("VIGILIS_DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("VIGILIS_DB_POOL_TIMEOUT", "30"))
+DB_QUERY_CACHE_SIZE = int(os.getenv("VIGILIS_DB_QUERY_CACHE_SIZE", "500"))
+DB_ECHO = os.getenv("VIGILIS_DB_ECHO", "false").lower() in ("1", "true", "yes")
 
 SECRET_KEY = os.getenv("VIGILIS_SECRET_KEY", "vigilis pharmacy")
 ALGORITHM = os.getenv("VIGILIS_JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("VIGILIS_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Upper bound for the `limit` query parameter of list endpoints.
+MAX_PAGE_SIZE = 200
+
+# Upper bound for the number of lines in one POST /invoices/{id}/items/batch.
+MAX_BATCH_ITEMS = 100
+
+# Worker threads available to sync (DB-bound) routes; AnyIO defaults to 40.
+THREADPOOL_SIZE = int(os.getenv("VIGILIS_THREADPOOL_SIZE", "40"))
+
 _cors_origins_raw = os.getenv(
     "VIGILIS_CORS_ORIGINS",
     "http://localhost:3000,http://localhost:5173,http://localhost:5174",
@@ -43,7 +43,8 @@ def require_role(*roles: UserRole) -> Callable:
             ...
     """
 
-    def _dependency(current_user: User = Depends(get_current_user)) -> User:
+    # No I/O here, so keep it on the event loop instead of taking a worker thread.
+    async def _dependency(current_user: User = Depends(get_current_user)) -> User:
         if roles and current_user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -1,16 +1,59 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
 
-from app.core.config import DATABASE_URL, DB_DIR
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import (
+    DATABASE_URL,
+    DB_DIR,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_QUERY_CACHE_SIZE,
+)
 
 DB_DIR.mkdir(parents=True, exist_ok=True)
 
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+
+# QueuePool gives each request thread its own connection; WAL lets those
+# connections read while another one writes. (StaticPool would share a single
+# connection, and therefore a single transaction, across all threads.)
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    query_cache_size=DB_QUERY_CACHE_SIZE,
+    echo=DB_ECHO,
+    # A local SQLite file cannot drop the connection; a database server can.
+    pool_pre_ping=not _is_sqlite,
+    connect_args={"check_same_thread": False} if _is_sqlite else {},
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+if _is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Runs once per new DBAPI connection, before it is handed to a Session.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, no fsync per commit
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# Keep loaded state after commit: routes serialize the objects they just wrote,
+# and expiring them would cost a SELECT per object on first access. Models with
+# server-generated columns set eager_defaults, so those values come back via
+# RETURNING on INSERT/UPDATE and no refresh() SELECT is needed either.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 def get_db():
@@ -21,7 +64,29 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def transaction(db: Session):
+    """Commit everything done inside the block once, or roll it all back.
+
+    Services only flush; routes wrap their service calls in this so each
+    request ends in a single commit.
+    """
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
 def init_db():
+    """Register all models on `Base.metadata`.
+
+    This does not create tables: the schema is owned by Alembic
+    (`alembic upgrade head`), which must have run once against the database.
+    The PRAGMAs above are applied per connection, so they also take effect on
+    databases created before they were introduced.
+    """
     import app.models  # noqa: F401
 
     return
@@ -1,18 +1,39 @@
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.admin import setup_admin
-from app.core.config import CORS_ORIGINS, SECRET_KEY
+from app.core.config import CORS_ORIGINS, SECRET_KEY, THREADPOOL_SIZE
 from app.api.router import api_router
 from app.db.session import init_db
+from app.services.audit_service import AuditService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync routes run in AnyIO's worker threads; once all are busy, requests queue.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Only registers models; no DDL runs here, so every worker can call it.
+    # Schema changes are applied out of band with `alembic upgrade head`.
+    init_db()
+    # Audit rows are batched and written off the request path; stopping the
+    # writer flushes whatever has been committed but not yet written.
+    AuditService.start_writer()
+    yield
+    AuditService.stop_writer()
 
 
-app = FastAPI(title="Vigilis Pharmacy Backend", version="1.0.0")
+# No default_response_class: routes with a response_model are serialized
+# straight to JSON bytes by Pydantic (FastAPI >= 0.130), and a custom class
+# such as ORJSONResponse would switch that fast path off.
+app = FastAPI(title="Vigilis Pharmacy Backend", version="1.0.0", lifespan=lifespan)
 
 
 @app.get("/")
-def get_root():
+async def get_root():
     return {
         "status": "success",
         "pharmacy": "Vigilis Pharmacy",
@@ -25,6 +46,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(
@@ -32,10 +54,6 @@ app.add_middleware(
     secret_key=SECRET_KEY,
 )
 
-@app.on_event("startup")
-def _startup():
-    init_db()
-    setup_admin(app, secret_key=SECRET_KEY)
-
+setup_admin(app, secret_key=SECRET_KEY)
 
 app.include_router(api_router)
@@ -1,13 +1,33 @@
 from app.db.base import Base
-from sqlalchemy import String, DateTime, Text, ForeignKey,func,Index
+from sqlalchemy import String, DateTime, LargeBinary, ForeignKey,func,Index
 from uuid import uuid4
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
-import json
-from json import JSONDecodeError
+import msgspec
 from sqlalchemy.orm import relationship
 
 
+# Module-level so every entry reuses the same encoder/decoder.
+# enc_hook covers any value msgspec has no native encoding for.
+_details_encoder = msgspec.msgpack.Encoder(enc_hook=str)
+_details_decoder = msgspec.msgpack.Decoder(dict)
+
+
+def encode_details(details: dict | msgspec.Struct) -> bytes:
+    """Serialize audit details (a dict or a payload Struct) to a MessagePack map."""
+    return _details_encoder.encode(details)
+
+
+def decode_details(raw: bytes | None) -> dict:
+    """Deserialize stored audit details; empty or unreadable payloads give {}."""
+    if not raw:
+        return {}
+    try:
+        return _details_decoder.decode(raw)
+    except (msgspec.DecodeError, TypeError):
+        return {}
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -18,7 +38,9 @@ class AuditLog(Base):
     resource_type: Mapped[str] = mapped_column(String(50), nullable=False)
     resource_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
 
-    details: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # MessagePack-encoded dict: written on every audited action, read rarely
+    # and never queried by the database. Use details_dict to read it.
+    details: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
@@ -47,19 +69,14 @@ class AuditLog(Base):
 
     @property
     def details_dict(self) -> dict:
-        if not self.details:
-            return {}
-        try:
-            return json.loads(self.details)
-        except (JSONDecodeError, TypeError):
-            return {}
+        return decode_details(self.details)
 
     @details_dict.setter
     def details_dict(self, value: dict | None):
         if value is None:
             self.details = None
         elif isinstance(value, dict):
-            self.details = json.dumps(value)
+            self.details = encode_details(value)
         else:
             raise ValueError("details_dict must be a dict or None")
 
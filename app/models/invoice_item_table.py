@@ -18,7 +18,8 @@ class InvoiceItem(Base):
     line_total = Column(Float, nullable=False)
 
     invoice = relationship("Invoice", back_populates="items")
-    product = relationship("Product")
-    product_unit = relationship("ProductUnit")
+    # Always needed when an item is rendered or finalized; load them in bulk.
+    product = relationship("Product", lazy="selectin")
+    product_unit = relationship("ProductUnit", lazy="selectin")
     
     
\ No newline at end of file
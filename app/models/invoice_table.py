@@ -1,7 +1,8 @@
 from uuid import uuid4
-from sqlalchemy import Column,String,DateTime,func,Enum as SAEnum, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column,String,DateTime,func,Enum as SAEnum, ForeignKey, Index, select
+from sqlalchemy.orm import column_property, relationship
 from app.db.base import Base
+from app.models.invoice_item_table import InvoiceItem
 from enum import Enum
 
 class InvoiceStatus(str, Enum):
@@ -23,5 +24,25 @@ class Invoice(Base):
     user = relationship("User", back_populates="invoices")
     
     items = relationship(
-        "InvoiceItem", back_populates="invoice", cascade="all, delete-orphan"
+        "InvoiceItem", back_populates="invoice", cascade="all, delete-orphan", lazy="selectin"
     )
+
+    # Sum of item line totals, computed by the database. Deferred so it is only
+    # selected where asked for (undefer) or on first access.
+    total_amount = column_property(
+        select(func.coalesce(func.sum(InvoiceItem.line_total), 0.0))
+        .where(InvoiceItem.invoice_id == id)
+        .correlate_except(InvoiceItem)
+        .scalar_subquery(),
+        deferred=True,
+    )
+
+    __table_args__ = (
+        # Backs the newest-first keyset pagination in list_invoices.
+        Index("ix_invoices_created_at_id", created_at.desc(), id.desc()),
+        # Same ordering when list_invoices filters by status or by seller.
+        Index("ix_invoices_status_created_at_id", status, created_at.desc(), id.desc()),
+        Index("ix_invoices_sold_by_id_created_at_id", sold_by_id, created_at.desc(), id.desc()),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
@@ -1,7 +1,7 @@
 from enum import Enum
 from uuid import uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, Enum as SAEnum, Float, Integer, String, func
+from sqlalchemy import Boolean, Column, DateTime, Enum as SAEnum, Float, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -61,3 +61,12 @@ class Product(Base):
     product_units = relationship(
         "ProductUnit", back_populates="product", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # Case-insensitive prefix search in list_products (range scan on lower(name)).
+        Index("ix_products_name_lower", func.lower(name)),
+        # Range filter and ordering in get_low_stock_products.
+        Index("ix_products_quantity_on_hand", quantity_on_hand),
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
@@ -11,6 +11,8 @@ from app.db.base import Base
 class StockAdjustmentReason(str, Enum):
     INITIAL_IMPORT = "INITIAL_IMPORT"
     MANUAL_ADJUSTMENT = "MANUAL_ADJUSTMENT"
+    SALE = "SALE"  # stock deducted by finalizing an invoice
+    SALE_REVERSAL = "SALE_REVERSAL"  # stock restored by cancelling a finalized invoice
 
 
 # Audit table: every change to stock is recorded here.
@@ -18,7 +20,7 @@ class StockAdjustment(Base):
     __tablename__ = "stock_adjustments"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid4()))
-    product_id = Column(String(36), ForeignKey("products.id"), nullable=False, index=True)
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
 
     # Delta applied to Product.quantity_on_hand (positive adds stock, negative removes stock).
     change_qty = Column(Integer, nullable=False)
@@ -38,6 +40,9 @@ class StockAdjustment(Base):
     user = relationship("User", back_populates="adjustments")
 
     __table_args__ = (
-        Index("ix_stock_adjustments_product_id", "product_id"),
+        # Per-product history, newest last; also serves plain product_id lookups.
+        Index("ix_stock_adjustments_product_id_created", "product_id", "created_at"),
         Index("ix_stock_adjustments_created_at", "created_at"),
     )
+
+    __mapper_args__ = {"eager_defaults": True}
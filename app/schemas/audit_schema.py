@@ -0,0 +1,42 @@
+from typing import Optional
+
+import msgspec
+
+
+# Audit `details` payloads for the hot write paths. msgspec encodes a Struct
+# straight to a MessagePack map with these field names, so the stored bytes
+# (and AuditLog.details_dict) are the same as for the equivalent dict.
+
+class CreateInvoicePayload(msgspec.Struct):
+    created_by: Optional[str]
+
+
+class AddItemPayload(msgspec.Struct):
+    invoice_id: str
+    product_id: str
+    product_name: str
+    quantity: int
+    unit_price: float
+    added_by: Optional[str]
+
+
+class FinalizePayload(msgspec.Struct):
+    total_amount: float
+    items_count: int
+    finalized_by: Optional[str]
+
+
+class CancelPayload(msgspec.Struct):
+    cancellation_reason: Optional[str]
+    cancelled_by: Optional[str]
+    previous_status: str
+
+
+class StockAdjustPayload(msgspec.Struct):
+    product_name: str
+    change_qty: int
+    reason: str
+    old_quantity: int
+    new_quantity: int
+    reference: Optional[str]
+    adjusted_by: Optional[str]
@@ -0,0 +1,36 @@
+from typing import Annotated, Any
+from uuid import UUID
+
+from pydantic import AfterValidator, BaseModel
+
+
+def is_uuid(value: str) -> bool:
+    """Whether `value` parses as a UUID (any form uuid.UUID accepts)."""
+    try:
+        UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_uuid(value: str) -> str:
+    if not is_uuid(value):
+        # Reported by pydantic as a 422
+        raise ValueError("badly formed hexadecimal UUID string")
+    return value
+
+
+# An ID that must look like a UUID but stays a str, matching how IDs are
+# stored and compared. Rejects malformed IDs at parse time, before any query.
+UUIDStr = Annotated[str, AfterValidator(_check_uuid)]
+
+
+class TrustedReadModel(BaseModel):
+    """Read schema that can also be built from ORM rows without validation."""
+
+    @classmethod
+    def from_orm_trusted(cls, obj: Any):
+        # model_construct skips all field validation. Only use this for rows
+        # loaded from our own database, whose column types already match the
+        # schema; never for request bodies or any other untrusted input.
+        return cls.model_construct(**{name: getattr(obj, name) for name in cls.model_fields})
@@ -2,10 +2,12 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from app.schemas.base_schema import UUIDStr
+
 
 class AddInvoiceItem(BaseModel):
-    product_id: str
-    product_unit_id: str
+    product_id: UUIDStr
+    product_unit_id: UUIDStr
     quantity: int = Field(ge=1)
     unit_price: Optional[float] = None
 
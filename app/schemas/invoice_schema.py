@@ -7,7 +7,8 @@ from app.models.invoice_table import InvoiceStatus
 from app.schemas.invoice_item_schema import ReadInvoiceItem
 
 
-class ReadInvoice(BaseModel):
+class ReadInvoiceSummary(BaseModel):
+    # Header fields only; used by list views so items are never loaded or serialized.
     model_config = {"from_attributes": True}
 
     id: str
@@ -15,5 +16,8 @@ class ReadInvoice(BaseModel):
     name: Optional[str] = None
     status: InvoiceStatus
     created_at: datetime
-    items: list[ReadInvoiceItem]
-    total_amount: Optional[float] = None
\ No newline at end of file
+    total_amount: Optional[float] = None
+
+
+class ReadInvoice(ReadInvoiceSummary):
+    items: list[ReadInvoiceItem]
\ No newline at end of file
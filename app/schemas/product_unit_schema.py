@@ -1,9 +1,10 @@
 from pydantic import BaseModel
 
 from app.models.product_unit_table import BaseUnit
+from app.schemas.base_schema import TrustedReadModel
 
 
-class ReadProductUnit(BaseModel):
+class ReadProductUnit(TrustedReadModel):
     model_config = {"from_attributes": True}
 
     id: str
@@ -12,3 +13,16 @@ class ReadProductUnit(BaseModel):
     multiplier_to_base: int
     price_per_unit: float
     is_default: bool
+
+
+class ReadEligibleProductUnit(BaseModel):
+    """A product + unit pair whose stock covers a requested number of units."""
+
+    model_config = {"from_attributes": True}
+
+    product_id: str
+    product_unit_id: str
+    product_name: str
+    unit_name: BaseUnit
+    unit_price: float
+    multiplier_to_base: int
@@ -4,6 +4,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 from app.models.product_table import ProductStatus, ProductType
+from app.schemas.base_schema import TrustedReadModel
 
 
 class ProductBase(BaseModel):
@@ -43,7 +44,7 @@ class CreateProduct(ProductBase):
     # Stock should start at 0 and be changed only via stock adjustments.
     pass
 
-class ReadProduct(ProductBase):
+class ReadProduct(ProductBase, TrustedReadModel):
 
     model_config = {"from_attributes": True}
     id: str
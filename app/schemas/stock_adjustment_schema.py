@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
 from app.models.stock_adjustment_table import StockAdjustmentReason
+from app.schemas.base_schema import TrustedReadModel
 from app.schemas.products_schema import ReadProduct
 
 
@@ -18,9 +19,10 @@ class StockAdjustmentBase(BaseModel):
 
 
 class CreateStockAdjustment(StockAdjustmentBase):
-    pass
+    # SALE / SALE_REVERSAL are written only by invoice finalize/cancel.
+    reason: Literal[StockAdjustmentReason.INITIAL_IMPORT, StockAdjustmentReason.MANUAL_ADJUSTMENT]
 
-class ReadStockAdjustment(StockAdjustmentBase):
+class ReadStockAdjustment(StockAdjustmentBase, TrustedReadModel):
     model_config = {"from_attributes": True}
     id: str
     product_id: str
@@ -1,14 +1,98 @@
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
-from app.models.audit_log_table import AuditLog
-from typing import Optional, Dict, Any
-import json
+from app.db.session import SessionLocal
+from app.models.audit_log_table import AuditLog, encode_details
+from typing import Optional, Dict, Any, List, Union
+from datetime import datetime, timezone
+from uuid import uuid4
+import logging
+import msgspec
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Audit rows recorded with AuditService.enqueue wait in the session's info dict
+# until its transaction commits, then go to this queue for the writer thread.
+# The hooks are on the Session class, so this holds for any session (sqladmin,
+# scripts, tests), not just SessionLocal ones.
+_PENDING_KEY = "pending_audit_logs"
+_BATCH_SIZE = 100
+_BATCH_WINDOW = 0.05  # seconds to wait for more rows before writing a batch
+_STOP = object()
+
+_queue: "queue.Queue[Any]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for row in session.info.pop(_PENDING_KEY, ()):
+        _queue.put(row)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    # The audited change was rolled back, so its audit rows must not be written
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _write_batch(rows: List[Dict[str, Any]]) -> None:
+    try:
+        with SessionLocal() as db:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+        return
+    except Exception:
+        if len(rows) == 1:
+            logger.exception("Failed to write audit log row %s", rows[0]["id"])
+            return
+        logger.warning("Batch of %d audit log rows failed; retrying one by one", len(rows))
+
+    # One bad row fails the whole INSERT; write the rows separately so only
+    # that row is lost
+    for row in rows:
+        _write_batch([row])
+
+
+def _run_worker() -> None:
+    stopping = False
+    while not stopping:
+        row = _queue.get()
+        if row is _STOP:
+            break
+        batch = [row]
+        deadline = time.monotonic() + _BATCH_WINDOW
+        while len(batch) < _BATCH_SIZE:
+            try:
+                row = _queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if row is _STOP:
+                stopping = True
+                break
+            batch.append(row)
+        _write_batch(batch)
+
+    # Flush whatever was committed after the stop request
+    leftover = []
+    while True:
+        try:
+            row = _queue.get_nowait()
+        except queue.Empty:
+            break
+        if row is not _STOP:
+            leftover.append(row)
+    if leftover:
+        _write_batch(leftover)
 
 
 class AuditService:
     @staticmethod
     def log_action( db: Session, user_id: str,action: str,
                 resource_type: str,resource_id: Optional[str] = None,
-                details: Optional[Dict[str, Any]] = None
+                details: Optional[Union[Dict[str, Any], msgspec.Struct]] = None
                 ) -> AuditLog:
 
 
@@ -17,8 +101,68 @@ class AuditService:
             action=action,
             resource_type=resource_type,
             resource_id=resource_id,
-            details=json.dumps(details) if details else None,
+            details=encode_details(details) if details else None,
         )
 
         db.add(audit_log)
         return audit_log
+
+    @staticmethod
+    def enqueue(db: Session, user_id: Optional[str], action: str,
+                resource_type: str, resource_id: Optional[str] = None,
+                details: Optional[Union[Dict[str, Any], msgspec.Struct]] = None
+                ) -> None:
+        """Record an audit entry off the request's critical path.
+
+        The entry is written by the background writer in a batched INSERT,
+        but only once `db` commits; a rollback discards it. Call this before
+        the commit of the change being audited. Without a running writer
+        (scripts, tests) it falls back to log_action.
+
+        Args:
+            db: Database session of the audited change
+            user_id: ID of user performing the action; without one nothing
+                is recorded
+            action: Action name (e.g. CREATE, FINALIZE)
+            resource_type: Type of the affected resource
+            resource_id: ID of the affected resource
+            details: Optional extra data, as a dict or a payload Struct
+                (see app.schemas.audit_schema), encoded as-is
+        """
+        if user_id is None:
+            # audit_logs.user_id references users.id, so an action with no
+            # acting user cannot be recorded
+            logger.warning("Skipping %s %s audit entry without a user", action, resource_type)
+            return
+
+        if _worker is None:
+            AuditService.log_action(db, user_id, action, resource_type, resource_id, details)
+            return
+
+        db.info.setdefault(_PENDING_KEY, []).append({
+            "id": str(uuid4()),
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": encode_details(details) if details else None,
+            # Time of the action, not of the batch write (UTC, like the server default)
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        })
+
+    @staticmethod
+    def start_writer() -> None:
+        """Start the background audit writer thread (idempotent)."""
+        global _worker
+        if _worker is None:
+            _worker = threading.Thread(target=_run_worker, name="audit-writer", daemon=True)
+            _worker.start()
+
+    @staticmethod
+    def stop_writer() -> None:
+        """Flush queued audit entries and stop the writer thread."""
+        global _worker
+        if _worker is not None:
+            worker, _worker = _worker, None
+            _queue.put(_STOP)
+            worker.join()
@@ -1,11 +1,16 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import case, insert, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload, undefer
 from app.models.invoice_table import Invoice, InvoiceStatus
 from app.models.invoice_item_table import InvoiceItem
 from app.models.product_table import Product
 from app.models.product_unit_table import ProductUnit
+from app.models.stock_adjustment_table import StockAdjustment, StockAdjustmentReason
+from app.schemas.audit_schema import AddItemPayload, CancelPayload, CreateInvoicePayload, FinalizePayload
+from app.schemas.base_schema import is_uuid
 from app.services.audit_service import AuditService
-from typing import Optional, List
-from decimal import Decimal
+from app.services.pagination import check_cursor
+from typing import Optional, List, Dict, Any
+from collections import defaultdict
 from uuid import uuid4
 
 
@@ -13,14 +18,13 @@ class InvoiceService:
     """Service for managing invoice operations with audit logging."""
 
     @staticmethod
-    def create_invoice(db: Session, sold_by_id: str) -> Invoice:
+    def create_invoice(db: Session, sold_by_id: str, commit: bool = False) -> Invoice:
         """Create a new draft invoice.
         
         Args:
             db: Database session
             sold_by_id: ID of user making the sale (required)
-            customer_name: Optional customer name
-            user_id: ID of user creating invoice
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
             Created invoice with DRAFT status
@@ -32,25 +36,25 @@ class InvoiceService:
         )
         
         db.add(invoice)
-        db.commit()
-        db.refresh(invoice)
         
-        # Log invoice creation
-        AuditService.log_action(
+        # Log invoice creation (written once the invoice commits)
+        AuditService.enqueue(
             db=db,
-            user_id=sold_by_id or invoice.id,
+            user_id=sold_by_id,
             action="CREATE",
             resource_type="INVOICE",
             resource_id=invoice.id,
-            details={
-                "created_by": sold_by_id
-            }
+            details=CreateInvoicePayload(created_by=sold_by_id)
         )
+
+        db.flush()
+        if commit:
+            db.commit()
         
         return invoice
 
     @staticmethod
-    def add_item(db: Session, invoice: Invoice, product_id: str, product_unit_id: str, quantity: int, unit_price: Decimal, user_id: Optional[str] = None) -> InvoiceItem:
+    def add_item(db: Session, invoice: Invoice, product_id: str, product_unit_id: str, quantity: int, unit_price: Optional[float] = None, user_id: Optional[str] = None, commit: bool = False) -> InvoiceItem:
         """Add an item to a draft invoice.
         
         Args:
@@ -59,65 +63,169 @@ class InvoiceService:
             product_id: Product ID
             product_unit_id: Product unit ID
             quantity: Quantity in units
-            unit_price: Price per unit
+            unit_price: Price per unit (defaults to the unit's price)
             user_id: ID of user adding item
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
             Created invoice item
         """
+        return InvoiceService.add_items(
+            db,
+            invoice,
+            [{"product_id": product_id, "product_unit_id": product_unit_id, "quantity": quantity, "unit_price": unit_price}],
+            user_id=user_id,
+            commit=commit,
+        )[0]
+
+    @staticmethod
+    def add_items(db: Session, invoice: Invoice, items: List[Dict[str, Any]], user_id: Optional[str] = None, commit: bool = False) -> List[InvoiceItem]:
+        """Add several items to a draft invoice in one transaction.
+        
+        Units and their products are validated with at most one query, and the
+        items and their audit entries are written with a single flush.
+        
+        Args:
+            db: Database session
+            invoice: Invoice to add items to
+            items: Dicts with product_id, product_unit_id, quantity and an
+                optional unit_price (defaults to the unit's price)
+            user_id: ID of user adding items
+            commit: If True, commits; otherwise only flushes and the caller commits
+            
+        Returns:
+            Created invoice items, in input order
+            
+        Raises:
+            ValueError: If the invoice is not a draft or a unit does not exist
+                or belong to the given product
+        """
         if invoice.status != InvoiceStatus.DRAFT:
             raise ValueError("Can only add items to DRAFT invoices")
         
-        # Validate product and unit
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
-            raise ValueError("Product not found")
-            
-        unit = db.query(ProductUnit).filter(ProductUnit.id == product_unit_id).first()
-        if not unit or unit.product_id != product_id:
-            raise ValueError("Invalid product unit")
+        # Units already in the session along with their product (e.g. loaded
+        # with the invoice's existing items) are reused without a query; the
+        # rest are loaded with their product joined in, so one query validates
+        # both, since a unit row already carries its product_id
+        unit_ids = {data["product_unit_id"] for data in items}
+        units = {}
+        for unit_id in unit_ids:
+            unit = db.identity_map.get(db.identity_key(ProductUnit, unit_id))
+            if unit is None:
+                continue
+            product = db.identity_map.get(db.identity_key(Product, unit.product_id))
+            if product is not None:
+                units[unit_id] = (unit, product)
+        missing = unit_ids - units.keys()
+        if missing:
+            units.update(
+                (u.id, (u, u.product))
+                for u in db.scalars(
+                    select(ProductUnit).options(joinedload(ProductUnit.product)).where(ProductUnit.id.in_(missing))
+                )
+            )
         
-        # Create invoice item
-        item = InvoiceItem(
-            id=str(uuid4()),
-            invoice_id=invoice.id,
-            product_id=product_id,
-            product_unit_id=product_unit_id,
-            quantity=quantity,
-            unit_price=unit_price
-        )
+        # Validate every line before touching the invoice
+        lines = []
+        for data in items:
+            unit, product = units.get(data["product_unit_id"], (None, None))
+            if not unit or unit.product_id != data["product_id"]:
+                raise ValueError("Invalid product unit")
+            lines.append((product, unit, data))
         
-        db.add(item)
-        db.commit()
-        db.refresh(item)
+        created = []
+        for product, unit, data in lines:
+            quantity = data["quantity"]
+            unit_price = data.get("unit_price")
+            if unit_price is None:
+                unit_price = unit.price_per_unit
+            item = InvoiceItem(
+                id=str(uuid4()),
+                invoice_id=invoice.id,
+                product_id=product.id,
+                product_unit_id=unit.id,
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=quantity * unit_price,
+                product=product,
+                product_unit=unit
+            )
+            # Appending keeps the loaded items collection current
+            invoice.items.append(item)
+            created.append(item)
+            
+            # Log item addition in the same transaction
+            AuditService.enqueue(
+                db=db,
+                user_id=user_id or invoice.sold_by_id,
+                action="ADD_ITEM",
+                resource_type="INVOICE_ITEM",
+                resource_id=item.id,
+                details=AddItemPayload(
+                    invoice_id=invoice.id,
+                    product_id=product.id,
+                    product_name=product.name,
+                    quantity=quantity,
+                    unit_price=float(unit_price),
+                    added_by=user_id
+                )
+            )
         
-        # Log item addition
-        AuditService.log_action(
-            db=db,
-            user_id=user_id or invoice.user_id,
-            action="ADD_ITEM",
-            resource_type="INVOICE_ITEM",
-            resource_id=item.id,
-            details={
-                "invoice_id": invoice.id,
+        db.flush()
+        # Only the SQL-computed total has to be reloaded
+        db.expire(invoice, ["total_amount"])
+        if commit:
+            db.commit()
+        
+        return created
+
+    @staticmethod
+    def _bulk_insert_adjustments(
+        db: Session,
+        changes: Dict[str, int],
+        reason: StockAdjustmentReason,
+        reference: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """Record one stock adjustment per product in a single executemany INSERT.
+
+        Runs in the caller's transaction; nothing is committed here.
+
+        Args:
+            db: Database session
+            changes: Signed base-unit delta per product id
+            reason: Reason stored on every row
+            reference: Optional reference (e.g. the invoice id)
+            user_id: ID of user making the change
+        """
+        rows = [
+            {
+                "id": str(uuid4()),
                 "product_id": product_id,
-                "product_name": product.name,
-                "quantity": quantity,
-                "unit_price": float(unit_price),
-                "added_by": user_id
+                "change_qty": change_qty,
+                "reason": reason,
+                "reference": reference,
+                "created_by_user_id": user_id,
             }
-        )
-        
-        return item
+            for product_id, change_qty in changes.items()
+            if change_qty
+        ]
+        if rows:
+            db.execute(insert(StockAdjustment), rows)
 
     @staticmethod
-    def finalize_invoice(db: Session, invoice: Invoice, user_id: Optional[str] = None):
+    def finalize_invoice(db: Session, invoice: Invoice, user_id: Optional[str] = None, commit: bool = False):
         """Finalize a draft invoice and deduct stock.
         
         Args:
             db: Database session
             invoice: Invoice to finalize
             user_id: ID of user finalizing invoice
+            commit: If True, commits; otherwise only flushes and the caller commits
+
+        Raises:
+            ValueError: If the invoice is not a draft, has no items, or stock is
+                insufficient; the caller must then roll back the session
         """
         if invoice.status != InvoiceStatus.DRAFT:
             raise ValueError("Only DRAFT invoices can be finalized")
@@ -125,47 +233,88 @@ class InvoiceService:
         if not invoice.items:
             raise ValueError("Invoice has no items")
 
-        # Check stock and deduct for each item
+        # Sum the base quantity needed per product across all items; product and
+        # unit come preloaded with the items (see get_invoice_with_items)
+        products: Dict[str, Product] = {}
+        deductions: Dict[str, int] = defaultdict(int)
         for item in invoice.items:
-            product: Product = item.product
-            unit: ProductUnit = item.product_unit
-
-            if unit.product_id != product.id:
+            unit = item.product_unit
+            products[item.product_id] = item.product
+            if unit.product_id != item.product_id:
                 raise ValueError("Unit does not belong to product")
+            deductions[item.product_id] += item.quantity * unit.multiplier_to_base
 
-            base_qty = item.quantity * unit.multiplier_to_base
+        # Validate everything before mutating so a failure leaves stock untouched.
+        # Current stock is read in one SELECT that also row-locks the products
+        # (FOR UPDATE; a no-op on SQLite, whose writes are serialized anyway),
+        # so a concurrent finalize cannot sell the same units in between.
+        available = {
+            row.id: row
+            for row in db.execute(
+                select(Product.id, Product.name, Product.quantity_on_hand)
+                .where(Product.id.in_(deductions))
+                .with_for_update()
+            )
+        }
+        for product_id, base_qty in deductions.items():
+            row = available[product_id]
+            if row.quantity_on_hand < base_qty:
+                raise ValueError(f"Not enough stock for {row.name}. Available: {row.quantity_on_hand}, Required: {base_qty}")
 
-            if product.quantity_on_hand < base_qty:
-                raise ValueError(f"Not enough stock for {product.name}. Available: {product.quantity_on_hand}, Required: {base_qty}")
+        # Deduct stock for every product in one conditional UPDATE. The WHERE
+        # clause repeats the check as a safety net, so stock can never go negative.
+        needed = case(deductions, value=Product.id)
+        deducted = set(db.scalars(
+            update(Product)
+            .where(Product.id.in_(deductions), Product.quantity_on_hand >= needed)
+            .values(quantity_on_hand=Product.quantity_on_hand - needed)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ))
+        if len(deducted) != len(deductions):
+            # The rows that were updated are undone by the caller's rollback
+            # (transaction() does that)
+            names = ", ".join(sorted(available[product_id].name for product_id in deductions if product_id not in deducted))
+            raise ValueError(f"Not enough stock for one or more products: {names}")
+        for product in products.values():
+            db.expire(product, ["quantity_on_hand"])
 
-            # Deduct stock
-            product.quantity_on_hand -= base_qty
+        InvoiceService._bulk_insert_adjustments(
+            db,
+            {product_id: -base_qty for product_id, base_qty in deductions.items()},
+            reason=StockAdjustmentReason.SALE,
+            reference=invoice.id,
+            user_id=user_id,
+        )
 
         # Update invoice status
         invoice.status = InvoiceStatus.FINALIZED
         
-        # Calculate total amount
-        total_amount = sum(item.quantity * item.unit_price for item in invoice.items)
-        invoice.total_amount = total_amount
-        
-        db.commit()
+        # Total for the audit log: Invoice.total_amount is summed in SQL and
+        # comes undeferred with the invoice (see get_invoice_with_items), so
+        # this neither iterates the items nor costs an extra query
+        total_amount = invoice.total_amount
         
         # Log finalization
-        AuditService.log_action(
+        AuditService.enqueue(
             db=db,
-            user_id=user_id or invoice.user_id,
+            user_id=user_id or invoice.sold_by_id,
             action="FINALIZE",
             resource_type="INVOICE",
             resource_id=invoice.id,
-            details={
-                "total_amount": float(total_amount),
-                "items_count": len(invoice.items),
-                "finalized_by": user_id
-            }
+            details=FinalizePayload(
+                total_amount=float(total_amount),
+                items_count=len(invoice.items),
+                finalized_by=user_id
+            )
         )
 
+        db.flush()
+        if commit:
+            db.commit()
+
     @staticmethod
-    def cancel_invoice(db: Session, invoice: Invoice, reason: Optional[str] = None, user_id: Optional[str] = None):
+    def cancel_invoice(db: Session, invoice: Invoice, reason: Optional[str] = None, user_id: Optional[str] = None, commit: bool = False):
         """Cancel an invoice and restore stock if finalized.
         
         Args:
@@ -173,38 +322,61 @@ class InvoiceService:
             invoice: Invoice to cancel
             reason: Optional cancellation reason
             user_id: ID of user canceling invoice
+            commit: If True, commits; otherwise only flushes and the caller commits
         """
-        if invoice.status == InvoiceStatus.CANCELLED:
+        # Snapshot before the status is overwritten below; the audit entry needs it
+        prev_status = invoice.status
+        if prev_status == InvoiceStatus.CANCELLED:
             raise ValueError("Invoice already cancelled")
 
         # If finalized, restore stock
-        if invoice.status == InvoiceStatus.FINALIZED:
+        if prev_status == InvoiceStatus.FINALIZED:
+            restorations: Dict[str, int] = defaultdict(int)
             for item in invoice.items:
-                base_qty = item.quantity * item.product_unit.multiplier_to_base
-                item.product.quantity_on_hand += base_qty
+                restorations[item.product_id] += item.quantity * item.product_unit.multiplier_to_base
+
+            # Restore every product in one UPDATE
+            db.execute(
+                update(Product)
+                .where(Product.id.in_(restorations))
+                .values(quantity_on_hand=Product.quantity_on_hand + case(restorations, value=Product.id))
+                .execution_options(synchronize_session=False)
+            )
+            for item in invoice.items:
+                db.expire(item.product, ["quantity_on_hand"])
+
+            InvoiceService._bulk_insert_adjustments(
+                db,
+                restorations,
+                reason=StockAdjustmentReason.SALE_REVERSAL,
+                reference=invoice.id,
+                user_id=user_id,
+            )
 
-        elif invoice.status != InvoiceStatus.DRAFT:
+        elif prev_status != InvoiceStatus.DRAFT:
             raise ValueError("Only DRAFT invoices can be cancelled")
 
         # Update status
         invoice.status = InvoiceStatus.CANCELLED
         
-        db.commit()
-        
         # Log cancellation
-        AuditService.log_action(
+        AuditService.enqueue(
             db=db,
-            user_id=user_id or invoice.user_id,
+            user_id=user_id or invoice.sold_by_id,
             action="CANCEL",
             resource_type="INVOICE",
             resource_id=invoice.id,
-            details={
-                "cancellation_reason": reason,
-                "cancelled_by": user_id,
-                "previous_status": invoice.status.value
-            }
+            details=CancelPayload(
+                cancellation_reason=reason,
+                cancelled_by=user_id,
+                previous_status=prev_status.value
+            )
         )
 
+        db.flush()
+        if commit:
+            db.commit()
+
     @staticmethod
     def get_invoice_with_items(db: Session, invoice_id: str) -> Optional[Invoice]:
         """Get invoice with all items loaded.
@@ -216,27 +388,61 @@ class InvoiceService:
         Returns:
             Invoice with items or None
         """
-        return db.query(Invoice).filter(Invoice.id == invoice_id).first()
+        # A malformed ID cannot match any row; answer without a query
+        if not is_uuid(invoice_id):
+            return None
+
+        # Primary-key lookup, then one more query for the items with their
+        # product and unit joined in; finalize/cancel read all three per item.
+        return db.get(
+            Invoice,
+            invoice_id,
+            options=[
+                selectinload(Invoice.items).joinedload(InvoiceItem.product),
+                selectinload(Invoice.items).joinedload(InvoiceItem.product_unit),
+                undefer(Invoice.total_amount),
+                raiseload("*"),
+            ],
+        )
     
     @staticmethod
-    def list_invoices(db: Session, status: Optional[InvoiceStatus] = None, user_id: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Invoice]:
-        """List invoices with optional filtering.
+    def list_invoices(db: Session, status: Optional[InvoiceStatus] = None, user_id: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None) -> List[Invoice]:
+        """List invoices with optional filtering, newest first.
+
+        Only invoice headers and totals are loaded; items are not.
         
         Args:
             db: Database session
             status: Optional status filter
             user_id: Optional user filter
             limit: Max results to return
-            offset: Results offset for pagination
+            cursor: ID of the last invoice of the previous page; omit for the first page
             
         Returns:
             List of invoices
+
+        Raises:
+            ValueError: If cursor is not the ID of an existing invoice
         """
-        query = db.query(Invoice)
+        # Headers only: the total comes from SQL and items are not loaded;
+        # raiseload flags any new code path that would lazy-load per row.
+        query = db.query(Invoice).options(
+            undefer(Invoice.total_amount),
+            raiseload("*"),
+        )
         
         if status:
             query = query.filter(Invoice.status == status)
         if user_id:
-            query = query.filter(Invoice.user_id == user_id)
-            
-        return query.order_by(Invoice.created_at.desc()).offset(offset).limit(limit).all()
+            query = query.filter(Invoice.sold_by_id == user_id)
+
+        query = query.order_by(Invoice.created_at.desc(), Invoice.id.desc())
+
+        if cursor:
+            # Seek past the cursor row via the (created_at, id) index instead of scanning OFFSET rows
+            anchor = select(Invoice.created_at).where(Invoice.id == cursor).scalar_subquery()
+            query = query.filter(tuple_(Invoice.created_at, Invoice.id) < tuple_(anchor, cursor))
+
+        invoices = query.limit(limit).all()
+        check_cursor(db, Invoice, cursor, invoices)
+        return invoices
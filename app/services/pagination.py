@@ -0,0 +1,23 @@
+from typing import Any, Optional, Sequence, Type
+
+from sqlalchemy.orm import Session
+
+
+def check_cursor(db: Session, model: Type[Any], cursor: Optional[str], page: Sequence[Any]) -> None:
+    """Reject a keyset cursor that is not the ID of an existing row.
+
+    An unknown cursor yields an empty page, as does paging past the last row;
+    the two are told apart only when the page is empty, so regular pages cost
+    no extra query.
+
+    Args:
+        db: Database session
+        model: Mapped class being paged
+        cursor: Cursor passed by the client, if any
+        page: Rows returned for that cursor
+
+    Raises:
+        ValueError: If cursor is not the ID of an existing row
+    """
+    if cursor and not page and db.get(model, cursor) is None:
+        raise ValueError("Invalid cursor")
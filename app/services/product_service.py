@@ -1,212 +1,249 @@
+from sqlalchemy import Row, bindparam, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.models.invoice_item_table import InvoiceItem
 from app.models.product_table import Product
-from app.models.stock_adjustment_table import StockAdjustment
+from app.models.product_unit_table import ProductUnit
+from app.models.stock_adjustment_table import StockAdjustment, StockAdjustmentReason
+from app.schemas.audit_schema import StockAdjustPayload
 from app.services.audit_service import AuditService
-from contextlib import contextmanager
-from typing import Optional, List
+from app.services.pagination import check_cursor
+from typing import Optional, List, Dict, Any
 from uuid import uuid4
 
 
+# Built once at import; values are bound per call, so every request reuses
+# the same statement object and hits SQLAlchemy's compiled-SQL cache.
+_UNITS_BY_PRODUCT = select(ProductUnit).where(ProductUnit.product_id == bindparam("product_id"))
+_INVOICE_ITEM_BY_PRODUCT = select(InvoiceItem.id).where(InvoiceItem.product_id == bindparam("product_id")).limit(1)
+_ELIGIBLE_PRODUCT_UNIT = (
+    select(
+        Product.id.label("product_id"),
+        ProductUnit.id.label("product_unit_id"),
+        Product.name.label("product_name"),
+        ProductUnit.name.label("unit_name"),
+        ProductUnit.price_per_unit.label("unit_price"),
+        ProductUnit.multiplier_to_base,
+    )
+    .join(ProductUnit, ProductUnit.product_id == Product.id)
+    .where(Product.quantity_on_hand >= bindparam("required_units") * ProductUnit.multiplier_to_base)
+    .order_by(Product.name, ProductUnit.id)
+    .limit(1)
+)
+
+
+def _is_sku_conflict(exc: IntegrityError) -> bool:
+    """Whether `exc` was raised by the unique index on products.sku."""
+    # PostgreSQL drivers name the violated constraint; SQLite only has the
+    # message ("UNIQUE constraint failed: products.sku")
+    constraint = getattr(getattr(exc.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint == "ix_products_sku"
+    return "products.sku" in str(exc.orig)
+
+
 class ProductService:
     """Service for managing product operations with audit logging."""
 
     @staticmethod
-    @contextmanager
-    def transaction(db: Session):
-        """Context manager for safe transaction handling."""
-        try:
-            yield
-            db.commit()
-        except Exception:
-            db.rollback()
-            raise
-
-    @staticmethod
-    def create_product(db: Session, name: str, description: Optional[str] = None, quantity_on_hand: int = 0, user_id: Optional[str] = None) -> Product:
+    def create_product(db: Session, data: Dict[str, Any], user_id: Optional[str] = None, commit: bool = False) -> Product:
         """Create a new product.
+
+        SKU uniqueness is enforced by the unique index on `products.sku`
+        rather than a pre-check query, so concurrent creates cannot both win.
         
         Args:
             db: Database session
-            name: Product name
-            description: Optional product description
-            quantity_on_hand: Initial stock quantity
+            data: Product fields (see CreateProduct)
             user_id: ID of user creating product
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
             Created product
+
+        Raises:
+            ValueError: If a product with the same SKU already exists
         """
-        product = Product(
-            id=str(uuid4()),
-            name=name,
-            description=description,
-            quantity_on_hand=quantity_on_hand
-        )
-        
+        product = Product(id=str(uuid4()), **data)
         db.add(product)
-        db.commit()
-        db.refresh(product)
-        
-        # Log product creation
-        AuditService.log_action(
+
+        # Log product creation in the same transaction as the insert
+        AuditService.enqueue(
             db=db,
-            user_id=user_id or product.id,
+            user_id=user_id,
             action="CREATE",
             resource_type="PRODUCT",
             resource_id=product.id,
             details={
-                "name": name,
-                "description": description,
-                "initial_quantity": quantity_on_hand,
+                "sku": product.sku,
+                "name": product.name,
                 "created_by": user_id
             }
         )
-        
+
+        try:
+            db.flush()
+        except IntegrityError as exc:
+            # The session must be rolled back now; transaction() does that
+            if _is_sku_conflict(exc):
+                raise ValueError("Product with this SKU already exists") from exc
+            raise
+
+        if commit:
+            db.commit()
         return product
 
     @staticmethod
-    def update_product(db: Session, product: Product, name: Optional[str] = None, description: Optional[str] = None, user_id: Optional[str] = None) -> Product:
+    def update_product(db: Session, product: Product, changes: Dict[str, Any], user_id: Optional[str] = None, commit: bool = False) -> Product:
         """Update product details.
         
         Args:
             db: Database session
             product: Product to update
-            name: Optional new name
-            description: Optional new description
+            changes: Fields to set (see UpdateProduct); only these are touched
             user_id: ID of user updating product
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
             Updated product
         """
-        old_values = {
-            "name": product.name,
-            "description": product.description
-        }
-        
-        if name is not None:
-            product.name = name
-        if description is not None:
-            product.description = description
-            
-        db.commit()
-        db.refresh(product)
+        old_values = {}
+        new_values = {}
+        for field, value in changes.items():
+            current = getattr(product, field)
+            if current != value:
+                old_values[field] = current
+                new_values[field] = value
+                setattr(product, field, value)
         
         # Log update if anything changed
-        if old_values["name"] != product.name or old_values["description"] != product.description:
-            AuditService.log_action(
+        if new_values:
+            AuditService.enqueue(
                 db=db,
-                user_id=user_id or product.id,
+                user_id=user_id,
                 action="UPDATE",
                 resource_type="PRODUCT",
                 resource_id=product.id,
                 details={
                     "old_values": old_values,
-                    "new_values": {
-                        "name": product.name,
-                        "description": product.description
-                    },
+                    "new_values": new_values,
                     "updated_by": user_id
                 }
             )
         
+        db.flush()
+        if commit:
+            db.commit()
+        
         return product
 
     @staticmethod
-    def delete_product(db: Session, product: Product, user_id: Optional[str] = None) -> bool:
+    def delete_product(db: Session, product: Product, user_id: Optional[str] = None, commit: bool = False) -> bool:
         """Delete a product (soft delete recommended in production).
         
         Args:
             db: Database session
             product: Product to delete
             user_id: ID of user deleting product
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
             True if deleted successfully
         """
         # Log deletion before removing
-        AuditService.log_action(
+        AuditService.enqueue(
             db=db,
-            user_id=user_id or product.id,
+            user_id=user_id,
             action="DELETE",
             resource_type="PRODUCT",
             resource_id=product.id,
             details={
+                "sku": product.sku,
                 "name": product.name,
-                "description": product.description,
                 "quantity_at_deletion": product.quantity_on_hand,
                 "deleted_by": user_id
             }
         )
         
         db.delete(product)
-        db.commit()
+        db.flush()
+        if commit:
+            db.commit()
         
         return True
 
     @staticmethod
-    def adjust_stock(db: Session, product: Product, change_qty: int, reason: str, reference: Optional[str] = None, note: Optional[str] = None, user_id: Optional[str] = None, commit: bool = True) -> StockAdjustment:
+    def adjust_stock(db: Session, product_id: str, change_qty: int, reason: str, reference: Optional[str] = None, note: Optional[str] = None, user_id: Optional[str] = None, commit: bool = False) -> Optional[StockAdjustment]:
         """Adjust the stock for a product and create a stock adjustment record.
 
+        The stock change is a single conditional UPDATE ... RETURNING, so the
+        non-negative check and the write happen atomically in the database.
+
         Args:
             db: Database session
-            product: Product instance to adjust
+            product_id: ID of the product to adjust
             change_qty: Positive or negative integer to change stock
             reason: Reason for adjustment
             reference: Optional external reference
             note: Optional note
             user_id: ID of the user performing the adjustment
-            commit: If True, commits automatically
+            commit: If True, commits; otherwise only flushes and the caller commits
             
         Returns:
-            Created stock adjustment record
+            Created stock adjustment record, or None if the product does not exist
         """
-        old_quantity = product.quantity_on_hand
-        new_qty = old_quantity + change_qty
-        
-        if new_qty < 0:
+        stmt = (
+            update(Product)
+            .where(Product.id == product_id, Product.quantity_on_hand + change_qty >= 0)
+            .values(quantity_on_hand=Product.quantity_on_hand + change_qty)
+            .returning(Product)
+        )
+        product = db.execute(stmt).scalar_one_or_none()
+
+        if product is None:
+            # Nothing matched: either the product is missing or stock would go negative
+            if db.get(Product, product_id) is None:
+                return None
             raise ValueError("Cannot adjust stock to a negative quantity")
 
-        # Update product stock
-        product.quantity_on_hand = new_qty
+        new_qty = product.quantity_on_hand
+        old_quantity = new_qty - change_qty
 
         # Create adjustment record
         adjustment = StockAdjustment(
             id=str(uuid4()),
             product_id=product.id,
             change_qty=change_qty,
-            reason=reason,
+            reason=StockAdjustmentReason(reason),
             reference=reference,
             note=note,
             created_by_user_id=user_id,
         )
 
-        db.add(product)
         db.add(adjustment)
 
+        # Queued before the commit, so it is written only if the adjustment is;
+        # with commit=False it rides along with the caller's commit.
+        AuditService.enqueue(
+            db=db,
+            user_id=user_id,
+            action="ADJUST_STOCK",
+            resource_type="PRODUCT",
+            resource_id=product.id,
+            details=StockAdjustPayload(
+                product_name=product.name,
+                change_qty=change_qty,
+                reason=reason,
+                old_quantity=old_quantity,
+                new_quantity=new_qty,
+                reference=reference,
+                adjusted_by=user_id
+            )
+        )
+
+        db.flush()
         if commit:
-            try:
-                db.commit()
-                
-                # Log stock adjustment
-                AuditService.log_action(
-                    db=db,
-                    user_id=user_id or product.id,
-                    action="ADJUST_STOCK",
-                    resource_type="PRODUCT",
-                    resource_id=product.id,
-                    details={
-                        "product_name": product.name,
-                        "change_qty": change_qty,
-                        "reason": reason,
-                        "old_quantity": old_quantity,
-                        "new_quantity": new_qty,
-                        "reference": reference,
-                        "adjusted_by": user_id
-                    }
-                )
-                
-            except Exception:
-                db.rollback()
-                raise
+            db.commit()
 
         return adjustment
 
@@ -221,30 +258,87 @@ class ProductService:
         Returns:
             Product or None
         """
-        return db.query(Product).filter(Product.id == product_id).first()
+        return db.get(Product, product_id)
 
     @staticmethod
-    def list_products(db: Session, name_filter: Optional[str] = None, min_stock: Optional[int] = None, limit: int = 50, offset: int = 0) -> List[Product]:
-        """List products with optional filtering.
+    def get_product_units(db: Session, product_id: str) -> List[ProductUnit]:
+        """Get all sellable units of a product.
         
         Args:
             db: Database session
-            name_filter: Optional name filter (partial match)
+            product_id: Product ID
+            
+        Returns:
+            List of product units
+        """
+        return list(db.scalars(_UNITS_BY_PRODUCT, {"product_id": product_id}))
+
+    @staticmethod
+    def find_eligible_product_unit(db: Session, required_units: int) -> Optional[Row]:
+        """Find a product + unit pair with enough stock to sell `required_units` of that unit.
+
+        One join query replaces walking every product's units from the client.
+        
+        Args:
+            db: Database session
+            required_units: Number of sale units that must be covered by stock
+            
+        Returns:
+            Row with product_id, product_unit_id, product_name, unit_name,
+            unit_price and multiplier_to_base, or None if no pair qualifies
+        """
+        return db.execute(_ELIGIBLE_PRODUCT_UNIT, {"required_units": required_units}).first()
+
+    @staticmethod
+    def has_invoice_history(db: Session, product_id: str) -> bool:
+        """Check whether any invoice item references the product.
+        
+        Args:
+            db: Database session
+            product_id: Product ID
+            
+        Returns:
+            True if the product appears on at least one invoice
+        """
+        return db.execute(_INVOICE_ITEM_BY_PRODUCT, {"product_id": product_id}).first() is not None
+
+    @staticmethod
+    def list_products(db: Session, name_filter: Optional[str] = None, min_stock: Optional[int] = None, limit: int = 50, cursor: Optional[str] = None) -> List[Product]:
+        """List products with optional filtering, ordered by name.
+        
+        Args:
+            db: Database session
+            name_filter: Optional case-insensitive name prefix
             min_stock: Optional minimum stock filter
             limit: Max results to return
-            offset: Results offset for pagination
+            cursor: ID of the last product of the previous page; omit for the first page
             
         Returns:
             List of products
+
+        Raises:
+            ValueError: If cursor is not the ID of an existing product
         """
         query = db.query(Product)
         
         if name_filter:
-            query = query.filter(Product.name.ilike(f"%{name_filter}%"))
+            # Prefix match expressed as a range so ix_products_name_lower can be used;
+            # a leading-wildcard LIKE '%x%' always scans the whole table.
+            prefix = name_filter.lower()
+            query = query.filter(func.lower(Product.name) >= prefix, func.lower(Product.name) < prefix + "\uffff")
         if min_stock is not None:
             query = query.filter(Product.quantity_on_hand >= min_stock)
-            
-        return query.order_by(Product.name).offset(offset).limit(limit).all()
+
+        query = query.order_by(Product.name, Product.id)
+
+        if cursor:
+            # Seek past the cursor row via the name index instead of scanning OFFSET rows
+            anchor = select(Product.name).where(Product.id == cursor).scalar_subquery()
+            query = query.filter(tuple_(Product.name, Product.id) > tuple_(anchor, cursor))
+
+        products = query.limit(limit).all()
+        check_cursor(db, Product, cursor, products)
+        return products
 
     @staticmethod
     def get_low_stock_products(db: Session, threshold: int = 10) -> List[Product]:
@@ -1,4 +1,4 @@
-from sqlalchemy import or_, select
+from sqlalchemy import bindparam, or_, select
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash, verify_password
@@ -7,17 +7,26 @@ from app.schemas.user_schema import RegisterUser
 from app.services.audit_service import AuditService
 
 
+# Built once at import and reused with per-call values (compiled-SQL cache hit).
+_USER_BY_USERNAME_OR_EMAIL = select(User).where(
+    or_(User.username == bindparam("username"), User.email == bindparam("email"))
+)
+
+
 class UserService:
     """User-related business logic (registration, authentication)."""
 
     @staticmethod
-    def register_user(db: Session, payload: RegisterUser) -> User:
-        """Create a new user after enforcing username/email uniqueness."""
+    def register_user(db: Session, payload: RegisterUser, commit: bool = False) -> User:
+        """Create a new user after enforcing username/email uniqueness.
 
-        stmt = select(User).where(
-            or_(User.username == payload.username, User.email == payload.email)
-        )
-        existing = db.execute(stmt).scalar_one_or_none()
+        Only flushes unless `commit` is True; the caller owns the transaction.
+        """
+
+        existing = db.execute(
+            _USER_BY_USERNAME_OR_EMAIL,
+            {"username": payload.username, "email": payload.email},
+        ).scalar_one_or_none()
 
         if existing:
             # Let the route decide exact HTTP response; here we just signal conflict
@@ -32,10 +41,11 @@ class UserService:
         )
         
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        # INSERT now so the generated ID is available for the audit entry;
+        # server defaults come back via RETURNING (eager_defaults), no refresh
+        db.flush()
         
-        # Log user creation after getting the ID
+        # Log user creation in the same transaction as the insert
         AuditService.log_action(db=db, 
                                 user_id=user.id,
                                 action="CREATE",
@@ -43,16 +53,19 @@ class UserService:
                                 resource_id=user.id,
                                 details={"username": user.username, "email": user.email, "role": user.role}
                                 )
+        db.flush()
+        if commit:
+            db.commit()
         return user
 
     @staticmethod
     def authenticate(db: Session, identifier: str, password: str) -> User | None:
         """Return user if identifier (username or email) + password are valid."""
 
-        stmt = select(User).where(
-            or_(User.username == identifier, User.email == identifier)
-        )
-        user = db.execute(stmt).scalar_one_or_none()
+        user = db.execute(
+            _USER_BY_USERNAME_OR_EMAIL,
+            {"username": identifier, "email": identifier},
+        ).scalar_one_or_none()
 
         if not user:
             return None
@@ -38,7 +38,7 @@ def _ensure_user(
         role=role,
         password=password,
     )
-    created = UserService.register_user(db, payload)
+    created = UserService.register_user(db, payload, commit=True)
     return created, True
 
 
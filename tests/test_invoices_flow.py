@@ -11,15 +11,16 @@ Then in another terminal:
 This is *not* a pytest test; it's a straightforward script that:
 - picks an existing product + one of its units
 - creates an invoice
-- adds items
+- adds items, one at a time and in batches (an invalid batch adds nothing)
 - finalizes the invoice (checks stock deduction)
 - cancels the invoice (checks stock is restored)
+- pages through /invoices/all one invoice at a time
 - prints useful debug output along the way.
 """
 
 import json
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 import requests
@@ -27,9 +28,13 @@ import requests
 
 BASE_URL = "http://127.0.0.1:8000"
 
+# One session for every call so the TCP connection is kept alive and reused
+# instead of being opened (and torn down) once per request.
+SESSION = requests.Session()
+
 
 def register_user(*, username: str, email: str, role: str, password: str) -> None:
-    resp = requests.post(
+    resp = SESSION.post(
         f"{BASE_URL}/auth/register",
         json={
             "username": username,
@@ -47,7 +52,7 @@ def register_user(*, username: str, email: str, role: str, password: str) -> Non
 
 
 def login(*, identifier: str, password: str) -> str:
-    resp = requests.post(
+    resp = SESSION.post(
         f"{BASE_URL}/auth/login",
         json={
             "identifier": identifier,
@@ -85,49 +90,27 @@ def _check(condition: bool, message: str) -> None:
         raise AssertionError(message)
 
 
-def pick_product_and_unit(*, headers: Dict[str, str]) -> ProductUnitRef:
+def pick_product_and_unit(*, headers: Dict[str, str], min_units: int = 7) -> ProductUnitRef:
     """Pick a product + unit pair that has enough stock to run the test.
 
-    We plan to add 2 units and then 3 units (total 5 sale-units) of the same
-    product+unit before finalizing. To avoid a "Not enough stock" error from
-    the finalize route, we pick a product+unit where:
+    We plan to add 2 units, then 3 units, then a batch of 1 + 1 units (total 7
+    sale-units) of the same product+unit before finalizing. To avoid a "Not
+    enough stock" error from the finalize route, we pick a product+unit where:
 
-        product.quantity_on_hand >= 5 * multiplier_to_base
+        product.quantity_on_hand >= 7 * multiplier_to_base
 
-    This relies on:
-      - GET /products
-      - GET /products/{product_id}/unit
+    The server finds such a pair in a single query:
+      - GET /products/eligible?min_units=7
     """
-    resp = requests.get(f"{BASE_URL}/products/", headers=headers)
+    resp = SESSION.get(f"{BASE_URL}/products/eligible", headers=headers, params={"min_units": min_units})
+    if resp.status_code == 404:
+        raise AssertionError("No product+unit found with enough stock to run the test; seed the DB first.")
     resp.raise_for_status()
-    products: List[Dict[str, Any]] = resp.json()
-    _check(len(products) > 0, "No products found; seed the DB first.")
-
-    for product in products:
-        product_id = product["id"]
-
-        resp_units = requests.get(f"{BASE_URL}/products/{product_id}/units", headers=headers)
-        resp_units.raise_for_status()
-        units: List[Dict[str, Any]] = resp_units.json()
-        if not units:
-            continue
-
-        for unit in units:
-            multiplier = unit["multiplier_to_base"]
-            return ProductUnitRef(
-                product_id=product_id,
-                product_unit_id=unit["id"],
-                product_name=product["name"],
-                unit_name=unit["name"],
-                unit_price=unit["price_per_unit"],
-                multiplier_to_base=multiplier,
-            )
-
-    raise AssertionError("No product+unit found with enough stock to run the test.")
+    return ProductUnitRef(**resp.json())
 
 
 def adjust_stock(*, product_id: str, change_qty: int, headers: Dict[str, str]) -> Dict[str, Any]:
-    resp = requests.post(
+    resp = SESSION.post(
         f"{BASE_URL}/products/{product_id}/adjust-stock",
         headers=headers,
         json={
@@ -140,19 +123,19 @@ def adjust_stock(*, product_id: str, change_qty: int, headers: Dict[str, str]) -
 
 
 def get_product_snapshot(*, product_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    resp = requests.get(f"{BASE_URL}/products/{product_id}", headers=headers)
+    resp = SESSION.get(f"{BASE_URL}/products/{product_id}", headers=headers)
     resp.raise_for_status()
     return resp.json()
 
 
 def create_invoice(*, sold_by_name: str, headers: Dict[str, str]) -> Dict[str, Any]:
     payload = {"sold_by_name": sold_by_name}
-    resp = requests.post(f"{BASE_URL}/invoices/", headers=headers, json=payload)
+    resp = SESSION.post(f"{BASE_URL}/invoices/", headers=headers, json=payload)
     resp.raise_for_status()
     return resp.json()
 
 
-def add_item(*, invoice_id: str, ref: ProductUnitRef, quantity: int, headers: Dict[str, str], unit_price: float | None = None) -> Dict[str, Any]:
+def _item_payload(*, ref: ProductUnitRef, quantity: int, unit_price: float | None = None) -> Dict[str, Any]:
     payload: Dict[str, Any] = {
         "product_id": ref.product_id,
         "product_unit_id": ref.product_unit_id,
@@ -171,8 +154,12 @@ def add_item(*, invoice_id: str, ref: ProductUnitRef, quantity: int, headers: Di
         effective_price = default_price if default_price and default_price > 0 else 100.0
 
     payload["unit_price"] = effective_price
+    return payload
 
-    resp = requests.post(
+
+def add_item(*, invoice_id: str, ref: ProductUnitRef, quantity: int, headers: Dict[str, str], unit_price: float | None = None) -> Dict[str, Any]:
+    payload = _item_payload(ref=ref, quantity=quantity, unit_price=unit_price)
+    resp = SESSION.post(
         f"{BASE_URL}/invoices/{invoice_id}/items",
         headers=headers,
         json=payload,
@@ -181,30 +168,48 @@ def add_item(*, invoice_id: str, ref: ProductUnitRef, quantity: int, headers: Di
     return resp.json()
 
 
+def add_items_batch(*, invoice_id: str, items: List[Dict[str, Any]], headers: Dict[str, str]) -> requests.Response:
+    # Returns the raw response so callers can also check the rejected case.
+    return SESSION.post(
+        f"{BASE_URL}/invoices/{invoice_id}/items/batch",
+        headers=headers,
+        json=items,
+    )
+
+
 def finalize_invoice(*, invoice_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    resp = requests.post(f"{BASE_URL}/invoices/{invoice_id}/finalize", headers=headers)
+    resp = SESSION.post(f"{BASE_URL}/invoices/{invoice_id}/finalize", headers=headers)
     resp.raise_for_status()
     return resp.json()
 
 
 def cancel_invoice(*, invoice_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    resp = requests.post(f"{BASE_URL}/invoices/{invoice_id}/cancel", headers=headers)
+    resp = SESSION.post(f"{BASE_URL}/invoices/{invoice_id}/cancel", headers=headers)
     resp.raise_for_status()
     return resp.json()
 
 
 def read_invoice(*, invoice_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    resp = requests.get(f"{BASE_URL}/invoices/{invoice_id}", headers=headers)
+    resp = SESSION.get(f"{BASE_URL}/invoices/{invoice_id}", headers=headers)
     resp.raise_for_status()
     return resp.json()
 
 
 def list_invoices(*, headers: Dict[str, str]) -> List[Dict[str, Any]]:
-    resp = requests.get(f"{BASE_URL}/invoices/all", headers=headers)
+    resp = SESSION.get(f"{BASE_URL}/invoices/all", headers=headers)
     resp.raise_for_status()
     return resp.json()
 
 
+def list_invoices_page(*, headers: Dict[str, str], limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    params: Dict[str, Any] = {"limit": limit}
+    if cursor is not None:
+        params["cursor"] = cursor
+    resp = SESSION.get(f"{BASE_URL}/invoices/all", headers=headers, params=params)
+    resp.raise_for_status()
+    return resp.json(), resp.headers.get("X-Next-Cursor")
+
+
 def main() -> None:
     suffix = str(uuid4())[:8]
     password = "test12345"
@@ -236,7 +241,7 @@ def main() -> None:
     before_qty = int(before_product["quantity_on_hand"])
     _pretty("Initial product snapshot", before_product)
 
-    required_units_total = 2 + 3
+    required_units_total = 2 + 3 + 1 + 1
     required_base_qty = required_units_total * int(ref.multiplier_to_base)
     if before_qty < required_base_qty:
         adjust_stock(
@@ -268,6 +273,33 @@ def main() -> None:
 
     _check(len(inv["items"]) >= 2, "Invoice should have at least 2 items now")
 
+    # 3b) Add two more lines in one batch request
+    resp = add_items_batch(
+        invoice_id=invoice_id,
+        items=[
+            _item_payload(ref=ref, quantity=1),
+            _item_payload(ref=ref, quantity=1, unit_price=120.0),
+        ],
+        headers=cashier,
+    )
+    resp.raise_for_status()
+    inv = resp.json()
+    _pretty("Invoice after batch of 2 lines", inv)
+    _check(len(inv["items"]) == 4, "Batch should add both lines")
+
+    # A batch with one invalid line (unknown unit) must add nothing
+    bad_line = _item_payload(ref=ref, quantity=1)
+    bad_line["product_unit_id"] = str(uuid4())
+    resp = add_items_batch(
+        invoice_id=invoice_id,
+        items=[_item_payload(ref=ref, quantity=1), bad_line],
+        headers=cashier,
+    )
+    _pretty("Batch with an invalid line", resp.json())
+    _check(resp.status_code == 400, f"Invalid batch should be rejected with 400, got {resp.status_code}")
+    items_after = read_invoice(invoice_id=invoice_id, headers=cashier)["items"]
+    _check(len(items_after) == 4, "Rejected batch should not add any line")
+
     # 4) Finalize invoice and verify stock deduction
     finalized = finalize_invoice(invoice_id=invoice_id, headers=cashier)
     _pretty("Finalized invoice", finalized)
@@ -302,6 +334,22 @@ def main() -> None:
     ids = [i["id"] for i in invoices]
     _check(invoice_id in ids, "Created invoice should appear in /invoices/all")
 
+    # 7) Page through /invoices/all one invoice at a time. A second draft makes
+    # sure the cashier has more than one page.
+    second_id = create_invoice(sold_by_name="Smoke Tester", headers=cashier)["id"]
+    paged_ids: List[str] = []
+    cursor: Optional[str] = None
+    while True:
+        page, cursor = list_invoices_page(headers=cashier, limit=1, cursor=cursor)
+        _check(len(page) <= 1, "A page with limit=1 should hold at most one invoice")
+        paged_ids.extend(i["id"] for i in page)
+        if cursor is None:
+            break
+        _check(cursor == page[-1]["id"], "X-Next-Cursor should be the last invoice on the page")
+    _pretty("Invoice IDs paged with limit=1", paged_ids)
+    _check(len(paged_ids) == len(set(paged_ids)), "Paging should not repeat invoices")
+    _check({invoice_id, second_id} <= set(paged_ids), "Paging should reach both of the cashier's invoices")
+
     print("\nAll invoice flow checks passed.")
 
 